@@ -9,18 +9,21 @@ import os
 import sys
 import time
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional
 import re
+import heapq
 import logging
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 
 # PDF processing
 import fitz  # PyMuPDF
 import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from nltk.stem import SnowballStemmer
 import numpy as np
+import orjson
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from collections import defaultdict, Counter
@@ -29,122 +32,193 @@ from collections import defaultdict, Counter
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Worker processes used for PDF extraction
+MAX_WORKERS = min(os.cpu_count() or 1, 4)
+
+# Minimum number of pages handed to a single page-range worker
+MIN_PAGES_PER_WORKER = 16
+
+# Sentences shorter than this (headers, list bullets) are not scored
+MIN_SENTENCE_LENGTH = 20
+
+# Tokenizers: lowercase alphabetic words, and sentences ending in . ! or ?
+_WORD_RE = re.compile(r"[a-z]+")
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Section headers: a single pattern with one alternative per header style
+_HEADER_RE = re.compile(
+    r'^(?:'
+    r'[A-Z][A-Z\s]+$'  # ALL CAPS
+    r'|\d+\.\s+[A-Z]'    # Numbered sections
+    r'|[A-Z][a-z]+\s[A-Z][a-z]+'  # Title Case
+    r'|[A-Z][a-z\s]+:'   # Colon endings
+    r')'
+)
+
+# Shared by all instances; the Snowball stemmer is rule-based and needs no corpus
+_STEMMER = SnowballStemmer('english')
+_stem = lru_cache(maxsize=None)(_STEMMER.stem)
+
+# Set once the required NLTK data has been found or successfully downloaded
+_NLTK_READY = False
+
+def _ensure_nltk():
+    """Download required NLTK data, checking at most once per process."""
+    global _NLTK_READY
+    if _NLTK_READY:
+        return
+    
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        # download() reports failure by returning False; leave the flag unset
+        # so a later call retries
+        if not nltk.download('stopwords', quiet=True):
+            return
+    
+    _NLTK_READY = True
+
+@lru_cache(maxsize=None)
+def _load_stop_words() -> frozenset:
+    """Load the English stop word list once per process."""
+    _ensure_nltk()
+    return frozenset(stopwords.words('english'))
+
+# Sections and their sentences are preprocessed repeatedly during scoring,
+# so the cache is shared by all instances
+@lru_cache(maxsize=8192)
+def preprocess_text(text: str) -> str:
+    """Preprocess text for analysis."""
+    stop_words = _load_stop_words()
+    
+    # Lowercase and tokenize on alphabetic runs, dropping special characters
+    words = _WORD_RE.findall(text.lower())
+    
+    # Remove stopwords and stem
+    words = [_stem(word) for word in words
+             if word not in stop_words and len(word) > 2]
+    
+    return ' '.join(words)
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> Dict[int, str]:
+    """Extract raw text for pages [start, end) of a PDF, keyed by page number."""
+    # Each worker opens its own document; MuPDF handles can't be shared
+    with fitz.open(pdf_path) as doc:
+        return {
+            page_num: page.get_text("text", sort=False)
+            for page_num, page in enumerate(doc.pages(start, end), start + 1)
+        }
+
+def extract_text_from_pdf(pdf_path: str, max_workers: int = 1) -> Dict[int, List[Dict[str, Any]]]:
+    """Extract the detected sections of each page of a PDF, keyed by page number."""
+    try:
+        with fitz.open(pdf_path) as doc:
+            # Only split long documents; small ones aren't worth the process startup
+            page_count = len(doc)
+            n_workers = min(max_workers, page_count // MIN_PAGES_PER_WORKER)
+            if n_workers <= 1:
+                # Extract from the handle that is already open
+                page_texts = {
+                    page_num: page.get_text("text", sort=False)
+                    for page_num, page in enumerate(doc, 1)
+                }
+
+        if n_workers > 1:
+            chunk_size = -(-page_count // n_workers)
+            page_texts = {}
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [
+                    executor.submit(_extract_page_range, pdf_path, start, min(start + chunk_size, page_count))
+                    for start in range(0, page_count, chunk_size)
+                ]
+                for future in as_completed(futures):
+                    page_texts.update(future.result())
+
+        # Only the sections are used downstream, so the raw page text isn't kept
+        pages_content = {}
+        for page_num in sorted(page_texts):
+            pages_content[page_num] = detect_sections(page_texts[page_num])
+
+        return pages_content
+    except Exception as e:
+        logger.error(f"Error extracting text from {pdf_path}: {str(e)}")
+        return {}
+
+def iter_document_sections(filenames: List[str]) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+    """Yield (document, page number, section) for each PDF, in input order."""
+    executor = None
+    if len(filenames) > 1:
+        # map yields in input order while later PDFs are still being parsed
+        executor = ProcessPoolExecutor(max_workers=min(MAX_WORKERS, len(filenames)))
+        documents = executor.map(extract_text_from_pdf, filenames)
+    else:
+        # A lone PDF is split across workers by page range instead
+        documents = (extract_text_from_pdf(filename, max_workers=MAX_WORKERS) for filename in filenames)
+
+    try:
+        for filename, pages in zip(filenames, documents):
+            logger.info(f"Processing {filename}")
+            for page_num, sections in pages.items():
+                for section in sections:
+                    yield filename, page_num, section
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def detect_sections(text: str) -> List[Dict[str, Any]]:
+    """Detect sections in text using patterns and formatting."""
+    sections = []
+    current_section = None
+    current_content = []
+
+    for line in map(str.strip, text.splitlines()):
+        if not line:
+            continue
+
+        # Check length first so long paragraph lines skip the regex
+        if len(line) < 100 and _HEADER_RE.match(line):
+            # Save previous section
+            if current_section and current_content:
+                sections.append({
+                    'title': current_section,
+                    'content': '\n'.join(current_content).strip()
+                })
+
+            # Start new section
+            current_section = line
+            current_content = []
+        else:
+            if current_section:
+                current_content.append(line)
+
+    # Add last section
+    if current_section and current_content:
+        sections.append({
+            'title': current_section,
+            'content': '\n'.join(current_content).strip()
+        })
+
+    # If no sections detected, create one main section
+    if not sections and text.strip():
+        sections.append({
+            'title': "Main Content",
+            'content': text.strip()
+        })
+
+    return sections
+
+def _top_indices(scores: np.ndarray, k: int) -> List[int]:
+    """Return indices of the k highest scores, best first."""
+    # heapq.nlargest keeps only k candidates (O(n log k)) and, like a stable
+    # sort, keeps equal scores (e.g. unscored fragments at 0) in input order
+    values = scores.tolist()
+    return heapq.nlargest(k, range(len(values)), key=values.__getitem__)
+
 class DocumentIntelligenceSystem:
     def __init__(self):
         """Initialize the document intelligence system."""
-        self.setup_nltk()
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
-        
-    def setup_nltk(self):
-        """Download required NLTK data."""
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt', quiet=True)
-        
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('stopwords', quiet=True)
-            
-        try:
-            nltk.data.find('corpora/wordnet')
-        except LookupError:
-            nltk.download('wordnet', quiet=True)
-
-    def extract_text_from_pdf(self, pdf_path: str) -> Dict[str, Any]:
-        """Extract text from PDF with page numbers and section detection."""
-        try:
-            doc = fitz.open(pdf_path)
-            pages_content = {}
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text = page.get_text()
-                pages_content[page_num + 1] = {
-                    'text': text,
-                    'sections': self.detect_sections(text)
-                }
-            
-            doc.close()
-            return pages_content
-        except Exception as e:
-            logger.error(f"Error extracting text from {pdf_path}: {str(e)}")
-            return {}
-
-    def detect_sections(self, text: str) -> List[Dict[str, Any]]:
-        """Detect sections in text using patterns and formatting."""
-        sections = []
-        lines = text.split('\n')
-        current_section = None
-        current_content = []
-        
-        # Patterns for section headers
-        header_patterns = [
-            r'^[A-Z][A-Z\s]+$',  # ALL CAPS
-            r'^\d+\.\s+[A-Z]',    # Numbered sections
-            r'^[A-Z][a-z]+\s[A-Z][a-z]+',  # Title Case
-            r'^[A-Z][a-z\s]+:',   # Colon endings
-        ]
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            is_header = False
-            for pattern in header_patterns:
-                if re.match(pattern, line) and len(line) < 100:
-                    is_header = True
-                    break
-            
-            if is_header:
-                # Save previous section
-                if current_section and current_content:
-                    sections.append({
-                        'title': current_section,
-                        'content': '\n'.join(current_content).strip()
-                    })
-                
-                # Start new section
-                current_section = line
-                current_content = []
-            else:
-                if current_section:
-                    current_content.append(line)
-        
-        # Add last section
-        if current_section and current_content:
-            sections.append({
-                'title': current_section,
-                'content': '\n'.join(current_content).strip()
-            })
+        self.stop_words = _load_stop_words()
         
-        # If no sections detected, create one main section
-        if not sections and text.strip():
-            sections.append({
-                'title': "Main Content",
-                'content': text.strip()
-            })
-        
-        return sections
-
-    def preprocess_text(self, text: str) -> str:
-        """Preprocess text for analysis."""
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters but keep spaces
-        text = re.sub(r'[^a-zA-Z\s]', ' ', text)
-        
-        # Tokenize and remove stopwords
-        words = word_tokenize(text)
-        words = [self.lemmatizer.lemmatize(word) for word in words 
-                if word not in self.stop_words and len(word) > 2]
-        
-        return ' '.join(words)
-
     def create_persona_profile(self, persona: Dict[str, str], job: Dict[str, str]) -> Dict[str, Any]:
         """Create a comprehensive persona profile with keywords and priorities."""
         role = persona.get('role', '').lower()
@@ -179,7 +253,7 @@ class DocumentIntelligenceSystem:
                 keywords.extend(role_words)
         
         # Add task-specific keywords
-        task_words = word_tokenize(task)
+        task_words = _WORD_RE.findall(task)
         task_words = [word for word in task_words if word not in self.stop_words]
         keywords.extend(task_words)
         
@@ -228,97 +302,106 @@ class DocumentIntelligenceSystem:
         
         return secondary
 
-    def calculate_relevance_score(self, section_content: str, persona_profile: Dict[str, Any]) -> float:
-        """Calculate relevance score for a section based on persona profile."""
-        processed_content = self.preprocess_text(section_content)
-        
-        if not processed_content.strip():
-            return 0.0
-        
-        # Keyword matching score
-        keyword_score = 0.0
-        content_words = set(processed_content.split())
-        
-        for keyword in persona_profile['keywords']:
-            if keyword.lower() in content_words:
-                keyword_score += 1.0
-        
-        # Normalize keyword score
-        keyword_score = keyword_score / len(persona_profile['keywords']) if persona_profile['keywords'] else 0.0
-        
-        # Primary focus score
-        primary_score = 0.0
-        for focus in persona_profile['primary_focus']:
-            if focus in processed_content:
-                primary_score += 2.0
-        
-        # Secondary focus score
-        secondary_score = 0.0
-        for focus in persona_profile['secondary_focus']:
-            if focus in processed_content:
-                secondary_score += 1.0
-        
-        # Content length penalty (prefer substantial content)
-        length_score = min(len(processed_content.split()) / 50.0, 1.0)
-        
-        # Combine scores with weights
-        total_score = (
-            keyword_score * 0.4 +
-            primary_score * 0.3 +
-            secondary_score * 0.2 +
-            length_score * 0.1
+    def build_persona_query(self, persona_profile: Dict[str, Any]) -> str:
+        """Build the persona "query" document that sections are scored against."""
+        terms = (
+            persona_profile['keywords'] +
+            persona_profile['primary_focus'] +
+            persona_profile['secondary_focus']
         )
         
-        return total_score
+        # Preprocess like the corpus so stems line up (this also splits
+        # focus labels such as 'group_activities' into words)
+        return preprocess_text(' '.join(terms))
 
-    def extract_and_rank_sections(self, documents_content: Dict[str, Dict], persona_profile: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Extract and rank sections from all documents."""
+    def fit_relevance_model(self, corpus: List[str], persona_profile: Dict[str, Any]) -> Tuple[TfidfVectorizer, Any, Any]:
+        """Fit TF-IDF over preprocessed texts plus the persona query.
+        
+        The query is appended to corpus. Returns the fitted vectorizer, the
+        persona vector and the matrix of the original corpus texts.
+        """
+        corpus.append(self.build_persona_query(persona_profile))
+        vectorizer = TfidfVectorizer(lowercase=False, token_pattern=r'[a-z]+', dtype=np.float32)
+        matrix = vectorizer.fit_transform(corpus)
+        return vectorizer, matrix[-1], matrix[:-1]
+
+    def extract_and_rank_sections(self, sections: Iterable[Tuple[str, int, Dict[str, Any]]], persona_profile: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[Tuple[TfidfVectorizer, Any]]]:
+        """Extract and rank sections streamed as (document, page number, section) tuples.
+        
+        Returns the top sections and the (vectorizer, persona vector) model
+        they were scored with, or None when there was nothing to score.
+        """
         all_sections = []
+        corpus = []
+        
+        # Preprocess each section as it arrives, while later PDFs are still parsing
+        for doc_name, page_num, section in sections:
+            if section['content'].strip():
+                all_sections.append({
+                    'document': doc_name,
+                    'page_number': page_num,
+                    'section_title': section['title'],
+                    'content': section['content']
+                })
+                corpus.append(preprocess_text(section['content']))
+        
+        if not all_sections:
+            return [], None
+        
+        # Fit TF-IDF once over all sections plus the persona query, then score
+        # every section with a single sparse product. The model is returned
+        # rather than kept on the instance, so refine_subsections only has to
+        # transform sentences and concurrent calls don't share state
+        vectorizer, persona_vector, matrix = self.fit_relevance_model(corpus, persona_profile)
+        scores = cosine_similarity(persona_vector, matrix)[0]
+        
+        # Take the top 5 sections by relevance score (descending) without sorting
+        # every section; ties keep input order, as with the original list.sort
+        top_sections = []
+        for rank, idx in enumerate(_top_indices(scores, 5), start=1):
+            section = all_sections[idx]
+            section['relevance_score'] = float(scores[idx])
+            section['importance_rank'] = rank
+            top_sections.append(section)
+        
+        return top_sections, (vectorizer, persona_vector)
+
+    def refine_subsections(self, sections: List[Dict[str, Any]], persona_profile: Dict[str, Any],
+                           model: Optional[Tuple[TfidfVectorizer, Any]] = None) -> List[Dict[str, Any]]:
+        """Create refined subsections with improved content.
         
-        for doc_name, pages in documents_content.items():
-            for page_num, page_content in pages.items():
-                for section in page_content['sections']:
-                    if section['content'].strip():
-                        relevance_score = self.calculate_relevance_score(
-                            section['content'], persona_profile
-                        )
-                        
-                        all_sections.append({
-                            'document': doc_name,
-                            'page_number': page_num,
-                            'section_title': section['title'],
-                            'content': section['content'],
-                            'relevance_score': relevance_score
-                        })
-        
-        # Sort by relevance score (descending)
-        all_sections.sort(key=lambda x: x['relevance_score'], reverse=True)
-        
-        # Add importance rank
-        for i, section in enumerate(all_sections[:10]):  # Top 10 sections
-            section['importance_rank'] = i + 1
-        
-        return all_sections[:5]  # Return top 5 sections
-
-    def refine_subsections(self, sections: List[Dict[str, Any]], persona_profile: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Create refined subsections with improved content."""
+        model is the (vectorizer, persona vector) pair fitted during ranking;
+        without it a model is fitted from persona_profile over the sentences.
+        """
         refined_subsections = []
-        
-        for section in sections:
-            content = section['content']
-            
-            # Split content into sentences
-            sentences = sent_tokenize(content)
-            
-            # Score each sentence
-            sentence_scores = []
-            for sentence in sentences:
-                score = self.calculate_relevance_score(sentence, persona_profile)
-                sentence_scores.append((sentence, score))
+        if not sections:
+            return refined_subsections
+        
+        # Split content into sentences
+        section_sentences = [_SENT_RE.split(section['content']) for section in sections]
+        all_sents = [sentence for sentences in section_sentences for sentence in sentences]
+        
+        # Score the sentences of every section in one pass; short fragments are
+        # skipped and score 0
+        scores = np.zeros(len(all_sents), dtype=np.float32)
+        scored = [i for i, sentence in enumerate(all_sents) if len(sentence) >= MIN_SENTENCE_LENGTH]
+        if scored:
+            texts = [preprocess_text(all_sents[i]) for i in scored]
+            if model is None:
+                _, persona_vector, sentence_matrix = self.fit_relevance_model(texts, persona_profile)
+            else:
+                vectorizer, persona_vector = model
+                sentence_matrix = vectorizer.transform(texts)
+            scores[scored] = cosine_similarity(persona_vector, sentence_matrix)[0]
+        
+        offset = 0
+        for section, sentences in zip(sections, section_sentences):
+            # Sentences of a section are contiguous in all_sents
+            section_scores = scores[offset:offset + len(sentences)]
+            offset += len(sentences)
             
-            # Sort sentences by score and take top ones
-            sentence_scores.sort(key=lambda x: x[1], reverse=True)
-            top_sentences = [s[0] for s in sentence_scores[:5]]  # Top 5 sentences
+            # Take the top scoring sentences
+            top_sentences = [sentences[i] for i in _top_indices(section_scores, 5)]  # Top 5 sentences
             
             # Create refined text
             refined_text = ' '.join(top_sentences)
@@ -347,21 +430,20 @@ class DocumentIntelligenceSystem:
         # Create persona profile
         persona_profile = self.create_persona_profile(persona, job)
         
-        # Extract text from all documents
-        documents_content = {}
-        for doc in documents:
-            filename = doc['filename']
+        # Collect the documents that exist, parsing each one once even if it
+        # is listed more than once
+        filenames = []
+        for filename in dict.fromkeys(doc['filename'] for doc in documents):
             if os.path.exists(filename):
-                logger.info(f"Processing {filename}")
-                documents_content[filename] = self.extract_text_from_pdf(filename)
+                filenames.append(filename)
             else:
                 logger.warning(f"File not found: {filename}")
         
-        # Extract and rank sections
-        top_sections = self.extract_and_rank_sections(documents_content, persona_profile)
+        # Extract and rank sections, streaming them from the PDFs as they are parsed
+        top_sections, model = self.extract_and_rank_sections(iter_document_sections(filenames), persona_profile)
         
-        # Create refined subsections
-        refined_subsections = self.refine_subsections(top_sections, persona_profile)
+        # Create refined subsections, reusing the model fitted during ranking
+        refined_subsections = self.refine_subsections(top_sections, persona_profile, model)
         
         # Prepare output
         output = {
@@ -411,8 +493,8 @@ def main():
     
     # Save output
     try:
-        with open(output_file, 'w') as f:
-            json.dump(result, f, indent=4)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
         logger.info(f"Output saved to {output_file}")
     except Exception as e:
         logger.error(f"Error saving output file: {str(e)}")
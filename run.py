@@ -7,6 +7,7 @@ Handles setup, validation, and execution
 import os
 import sys
 import json
+import glob
 import subprocess
 import time
 from pathlib import Path
@@ -22,7 +23,7 @@ def check_python_version():
 
 def check_dependencies():
     """Check if required packages are installed."""
-    required_packages = ['fitz', 'nltk', 'numpy', 'sklearn']
+    required_packages = ['fitz', 'nltk', 'numpy', 'sklearn', 'orjson']
     missing_packages = []
     
     for package in required_packages:
@@ -35,6 +36,8 @@ def check_dependencies():
                 import numpy
             elif package == 'sklearn':
                 import sklearn
+            elif package == 'orjson':
+                import orjson
             print(f"✅ {package} is installed")
         except ImportError:
             missing_packages.append(package)
@@ -59,9 +62,7 @@ def setup_nltk():
     print("\n📚 Setting up NLTK data...")
     try:
         import nltk
-        nltk.download('punkt', quiet=True)
         nltk.download('stopwords', quiet=True)
-        nltk.download('wordnet', quiet=True)
         print("✅ NLTK data downloaded successfully")
         return True
     except Exception as e:
@@ -105,8 +106,8 @@ def validate_input_file(input_file):
         print(f"❌ Error validating input file: {e}")
         return False
 
-def run_system(input_file, output_file):
-    """Run the document intelligence system."""
+def run_system(input_file, output_file, system=None):
+    """Run the document intelligence system, optionally reusing an existing instance."""
     print(f"\n🚀 Running document intelligence system...")
     print(f"Input: {input_file}")
     print(f"Output: {output_file}")
@@ -114,7 +115,9 @@ def run_system(input_file, output_file):
     start_time = time.time()
     
     try:
-        # Import and run the main system
+        # Import and run the main system; deferred so 'setup' works without
+        # dependencies, and only paid once since modules are cached
+        import orjson
         from main import DocumentIntelligenceSystem
         
         # Load input data
@@ -122,12 +125,13 @@ def run_system(input_file, output_file):
             input_data = json.load(f)
         
         # Initialize and process
-        system = DocumentIntelligenceSystem()
+        if system is None:
+            system = DocumentIntelligenceSystem()
         result = system.process_documents(input_data)
         
         # Save output
-        with open(output_file, 'w') as f:
-            json.dump(result, f, indent=4)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
         
         processing_time = time.time() - start_time
         print(f"✅ Processing completed successfully in {processing_time:.2f} seconds")
@@ -147,6 +151,45 @@ def run_system(input_file, output_file):
         traceback.print_exc()
         return False
 
+def batch_output_files(input_files, output_dir):
+    """Map each input to an output path named after its location under the inputs' common directory."""
+    input_paths = [os.path.abspath(input_file) for input_file in input_files]
+    base_dir = os.path.commonpath([os.path.dirname(path) for path in input_paths])
+    
+    output_files = []
+    for path in input_paths:
+        # e.g. "Collection 1/challenge1b_input.json" -> "Collection 1_challenge1b_input_output.json"
+        name = os.path.splitext(os.path.relpath(path, base_dir))[0].replace(os.sep, '_')
+        output_files.append(os.path.join(output_dir, f"{name}_output.json"))
+    
+    return output_files
+
+def run_batch(input_files, output_dir):
+    """Run the system over several input files with a single instance."""
+    from main import DocumentIntelligenceSystem
+    
+    output_files = batch_output_files(input_files, output_dir)
+    if len(set(output_files)) != len(output_files):
+        duplicates = sorted({f for f in output_files if output_files.count(f) > 1})
+        print(f"❌ Several inputs map to the same output file: {duplicates}")
+        return False
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # One instance keeps NLTK data and the preprocessing cache warm across inputs
+    system = DocumentIntelligenceSystem()
+    
+    failed = []
+    for input_file, output_file in zip(input_files, output_files):
+        if not run_system(input_file, output_file, system):
+            failed.append(input_file)
+    
+    print(f"\n📦 Batch completed: {len(input_files) - len(failed)}/{len(input_files)} inputs processed")
+    if failed:
+        print(f"❌ Failed inputs: {failed}")
+        return False
+    return True
+
 def create_sample_files():
     """Create sample files for testing."""
     print("\n📝 Creating sample files...")
@@ -189,6 +232,7 @@ def main():
         print("\nUsage:")
         print("  python run.py setup                    # Set up the system")
         print("  python run.py run <input> <output>     # Run the system")
+        print("  python run.py batch <glob> <out_dir>   # Run over many inputs")
         print("  python run.py test                     # Run with sample data")
         sys.exit(1)
     
@@ -259,6 +303,39 @@ def main():
         if not run_system(input_file, output_file):
             sys.exit(1)
     
+    elif command == 'batch':
+        if len(sys.argv) != 4:
+            print("Usage: python run.py batch <input_glob> <output_dir>")
+            sys.exit(1)
+        
+        input_files = sorted(glob.glob(sys.argv[2]))
+        output_dir = sys.argv[3]
+        
+        if not input_files:
+            print(f"❌ No input files match: {sys.argv[2]}")
+            sys.exit(1)
+        
+        print("\n🔍 Pre-flight checks...")
+        
+        # Check Python version
+        if not check_python_version():
+            sys.exit(1)
+        
+        # Check dependencies
+        missing = check_dependencies()
+        if missing:
+            print(f"❌ Missing packages: {missing}")
+            print("Run 'python run.py setup' first")
+            sys.exit(1)
+        
+        # Validate every input before processing any of them
+        if not all([validate_input_file(input_file) for input_file in input_files]):
+            sys.exit(1)
+        
+        # Run system
+        if not run_batch(input_files, output_dir):
+            sys.exit(1)
+    
     elif command == 'test':
         print("\n🧪 Running test with sample data...")
         
@@ -276,7 +353,7 @@ def main():
     
     else:
         print(f"❌ Unknown command: {command}")
-        print("Available commands: setup, run, test")
+        print("Available commands: setup, run, batch, test")
         sys.exit(1)
 
 if __name__ == "__main__":